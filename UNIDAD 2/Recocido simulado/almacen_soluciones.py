@@ -0,0 +1,140 @@
+import json
+import os
+import random
+
+import numpy as np
+
+
+def insercion_mas_barata(ruta, nodos, matriz_costos):
+    """
+    Inserta 'nodos' en 'ruta' con la heurística de inserción más barata:
+    en cada paso se inserta el nodo (y en la posición) que menos aumenta el costo.
+
+    Args:
+        ruta (list): Ruta que empieza y termina en el CEDIS (índices de la matriz).
+        nodos (list): Nodos que faltan por visitar.
+        matriz_costos (MatrizCostos): Costos entre nodos.
+
+    Returns:
+        list: Nueva ruta con todos los nodos insertados.
+    """
+    ruta = list(ruta)
+    pendientes = list(nodos)
+    while pendientes:
+        origenes = np.asarray(ruta[:-1])[np.newaxis, :]
+        destinos = np.asarray(ruta[1:])[np.newaxis, :]
+        candidatos = np.asarray(pendientes)[:, np.newaxis]
+
+        # Aumento de costo al meter cada candidato entre cada par consecutivo: (candidatos, tramos)
+        aumento = (matriz_costos[origenes, candidatos] + matriz_costos[candidatos, destinos] -
+                   matriz_costos[origenes, destinos])
+        k, posicion = np.unravel_index(np.argmin(aumento), aumento.shape)
+        ruta.insert(posicion + 1, pendientes.pop(k))
+    return ruta
+
+
+def temperatura_arranque_caliente(ruta, matriz_costos, factor=1.0, muestras=100):
+    """
+    Temperatura inicial del Recocido Simulado para reoptimizar desde una ruta
+    ya buena: 'factor' × el cambio de costo promedio (en valor absoluto) de
+    'muestras' vecinos 2-opt de la ruta.
+
+    Así la temperatura queda en la escala de costos del escenario: lo bastante
+    alta para salir de óptimos locales, pero sin volver a una ruta aleatoria.
+
+    Args:
+        ruta (list): Ruta que empieza y termina en el CEDIS (índices de la matriz).
+        matriz_costos (MatrizCostos): Costos entre nodos.
+        factor (float): Múltiplo del cambio de costo promedio.
+        muestras (int): Cuántos vecinos se evalúan.
+
+    Returns:
+        float: Temperatura inicial (0.0 si la ruta tiene menos de 2 tiendas).
+    """
+    if len(ruta) < 4:
+        return 0.0
+    costo = matriz_costos.costo_ruta(ruta)
+    cambios = []
+    for _ in range(muestras):
+        # Mismo vecino que RecocidoSimulado.generar_vecino
+        i, j = sorted(random.sample(range(1, len(ruta) - 1), 2))
+        vecino = ruta[:i] + ruta[i:j + 1][::-1] + ruta[j + 1:]
+        cambios.append(abs(matriz_costos.costo_ruta(vecino) - costo))
+    return factor * float(np.mean(cambios))
+
+
+class AlmacenSoluciones:
+    """
+    Guarda en disco las rutas ya optimizadas, por CEDIS y conjunto de tiendas,
+    para arrancar las siguientes optimizaciones desde ellas (arranque en caliente).
+
+    Los nodos se identifican con un ID estable (ej. la columna 'Nombre'), no con
+    su posición en el CSV, para que las rutas sigan valiendo si cambia el archivo.
+    """
+
+    def __init__(self, ruta_archivo, max_por_cedis=20):
+        """
+        Args:
+            ruta_archivo (str): Archivo JSON donde se guardan las soluciones.
+            max_por_cedis (int): Cuántas soluciones se conservan por CEDIS (las más recientes).
+        """
+        self.ruta_archivo = ruta_archivo
+        self.max_por_cedis = max_por_cedis
+        self.soluciones = {}
+        if os.path.exists(ruta_archivo):
+            with open(ruta_archivo, 'r', encoding='utf-8') as f:
+                self.soluciones = json.load(f)
+
+    def guardar(self, cedis, ruta, costo):
+        """
+        Guarda una ruta (IDs, empieza y termina en el CEDIS). Si ya había una
+        para el mismo conjunto de tiendas, se reemplaza.
+        """
+        tiendas = sorted(set(ruta[1:-1]), key=str)
+        entradas = [e for e in self.soluciones.get(str(cedis), []) if e['tiendas'] != tiendas]
+        entradas.append({'tiendas': tiendas, 'ruta': list(ruta), 'costo': float(costo)})
+        self.soluciones[str(cedis)] = entradas[-self.max_por_cedis:]
+
+        with open(self.ruta_archivo, 'w', encoding='utf-8') as f:
+            json.dump(self.soluciones, f, ensure_ascii=False, indent=1)
+
+    def buscar(self, cedis, tiendas):
+        """
+        Devuelve la solución guardada más parecida para este CEDIS (la de mayor
+        índice de Jaccard entre conjuntos de tiendas), o None si no hay ninguna
+        que comparta tiendas.
+        """
+        tiendas = set(tiendas)
+        mejor, mejor_similitud = None, 0.0
+        for entrada in self.soluciones.get(str(cedis), []):
+            previas = set(entrada['tiendas'])
+            similitud = len(tiendas & previas) / len(tiendas | previas)
+            if similitud > mejor_similitud:
+                mejor, mejor_similitud = entrada, similitud
+        return mejor
+
+    def ruta_inicial(self, cedis, tiendas, matriz_escenario):
+        """
+        Repara la solución previa más parecida para el escenario actual:
+        quita las tiendas que ya no están e inserta las nuevas con inserción
+        más barata.
+
+        Args:
+            cedis: ID del CEDIS.
+            tiendas (list): IDs de las tiendas del escenario.
+            matriz_escenario (MatrizCostos): Sub-matriz del escenario, donde el
+                nodo local k es el k-ésimo de [cedis] + tiendas.
+
+        Returns:
+            list: Ruta con índices locales (0 = CEDIS), o None si no hay solución previa.
+        """
+        previa = self.buscar(cedis, tiendas)
+        if previa is None:
+            return None
+
+        local = {id_nodo: k for k, id_nodo in enumerate([cedis] + list(tiendas))}
+        conservadas = [local[t] for t in previa['ruta'][1:-1] if t in local and t != cedis]
+        previas = set(previa['tiendas'])
+        nuevas = [local[t] for t in tiendas if t not in previas]
+
+        return insercion_mas_barata([0] + conservadas + [0], nuevas, matriz_escenario)
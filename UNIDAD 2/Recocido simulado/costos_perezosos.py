@@ -0,0 +1,248 @@
+import os
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+from matriz_costos import MatrizCostos
+
+RADIO_TIERRA_KM = 6371.0
+
+
+def distancia_haversine(lat1, lon1, lat2, lon2):
+    """
+    Distancia en km sobre la superficie terrestre entre puntos (lat, lon) en grados.
+    Acepta escalares o arreglos (se aplica broadcasting de NumPy).
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2 +
+         np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class ProveedorCostosPerezoso(MatrizCostos):
+    """
+    Matriz de costos que NO se guarda completa en memoria.
+
+    La matriz N×N se divide en teselas (bloques) de tamano_tesela×tamano_tesela.
+    Cuando se pide un costo:
+    1. Si la tesela está en el caché, se usa directamente.
+    2. Si existe una tesela explícita en disco ('tesela_<fila>_<columna>.npy'),
+       se carga de ahí. Como la métrica es simétrica, si solo existe la tesela
+       transpuesta ('tesela_<columna>_<fila>.npy') se usa esa transpuesta;
+       basta con guardar cada par de teselas en una sola dirección.
+    3. Si no, el costo se calcula con las coordenadas de las tiendas:
+       distancia haversine (km) × factor de combustible. Solo se calcula la
+       tesela completa cuando la consulta pide al menos 'min_pares_tesela'
+       pares de ella (ej. la sub-matriz de un escenario compacto); si pide
+       pocos (una ruta con tiendas dispersas), se calculan solo esos pares.
+    Las teselas usadas recientemente se guardan en un caché LRU de tamaño fijo.
+
+    Se usa igual que una MatrizCostos (matriz[i, j], costo_ruta, submatriz),
+    así que el Recocido Simulado funciona sin cambios en redes nacionales.
+    """
+
+    PATRON_TESELA = re.compile(r'^tesela_(\d+)_(\d+)\.npy$')
+
+    def __init__(self, latitudes, longitudes, factor_combustible=1.0,
+                 directorio_teselas=None, tamano_tesela=256, max_teselas=64,
+                 min_pares_tesela=None, dtype=np.float64):
+        """
+        Args:
+            latitudes (array): Latitud WGS84 de cada nodo.
+            longitudes (array): Longitud WGS84 de cada nodo.
+            factor_combustible (float): Costo de combustible por km recorrido.
+            directorio_teselas (str): Carpeta con teselas explícitas de la matriz (opcional).
+            tamano_tesela (int): Lado de cada tesela (en nodos).
+            max_teselas (int): Cuántas teselas se mantienen en el caché.
+            min_pares_tesela (int): Pares de una misma tesela que debe pedir una
+                consulta para calcular la tesela completa y guardarla en el caché
+                (None = la mitad de la tesela).
+            dtype: Tipo de dato de las teselas calculadas.
+        """
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        super().__init__(None, len(self.latitudes))
+        self.factor_combustible = factor_combustible
+        self.directorio_teselas = directorio_teselas
+        self.tamano_tesela = int(tamano_tesela)
+        self.max_teselas = int(max_teselas)
+        self.min_pares_tesela = (self.tamano_tesela ** 2 // 2 if min_pares_tesela is None
+                                 else int(min_pares_tesela))
+        self._dtype = np.dtype(dtype)
+        self.num_teselas = -(-self.n // self.tamano_tesela)  # División hacia arriba
+
+        self._cache = OrderedDict()
+        self.aciertos = 0
+        self.fallos = 0
+        self.calculos_directos = 0  # Pares calculados sin pasar por una tesela
+
+        # Índice de las teselas explícitas disponibles en disco
+        self._teselas_en_disco = set()
+        if directorio_teselas is not None and os.path.isdir(directorio_teselas):
+            for nombre in os.listdir(directorio_teselas):
+                coincidencia = self.PATRON_TESELA.match(nombre)
+                if coincidencia:
+                    self._teselas_en_disco.add((int(coincidencia.group(1)), int(coincidencia.group(2))))
+
+    @classmethod
+    def desde_tiendas(cls, df_tiendas, factor_combustible=1.0, **kwargs):
+        """Crea el proveedor a partir del DataFrame de tiendas (columnas WGS84)."""
+        return cls(df_tiendas['Latitud_WGS84'].values,
+                   df_tiendas['Longitud_WGS84'].values,
+                   factor_combustible=factor_combustible, **kwargs)
+
+    # --- Teselas ---
+
+    def _tesela(self, fila_tesela, columna_tesela):
+        """Devuelve una tesela desde el caché, el disco o calculándola."""
+        clave = (fila_tesela, columna_tesela)
+        tesela = self._cache.get(clave)
+        if tesela is not None:
+            self.aciertos += 1
+            self._cache.move_to_end(clave)
+            return tesela
+
+        self.fallos += 1
+        if clave in self._teselas_en_disco:
+            tesela = self._cargar_tesela(fila_tesela, columna_tesela)
+        elif (columna_tesela, fila_tesela) in self._teselas_en_disco:
+            tesela = np.ascontiguousarray(self._cargar_tesela(columna_tesela, fila_tesela).T)
+        else:
+            tesela = self._calcular_tesela(fila_tesela, columna_tesela)
+
+        self._cache[clave] = tesela
+        if len(self._cache) > self.max_teselas:
+            self._cache.popitem(last=False)  # Expulsar la menos usada recientemente
+        return tesela
+
+    def _rangos_tesela(self, fila_tesela, columna_tesela):
+        """Rangos de filas y columnas de la matriz que cubre una tesela (las del borde son más chicas)."""
+        t = self.tamano_tesela
+        filas = slice(fila_tesela * t, min((fila_tesela + 1) * t, self.n))
+        columnas = slice(columna_tesela * t, min((columna_tesela + 1) * t, self.n))
+        return filas, columnas
+
+    def _cargar_tesela(self, fila_tesela, columna_tesela):
+        """Carga una tesela explícita del disco y verifica que tenga la forma esperada."""
+        ruta = os.path.join(self.directorio_teselas, f'tesela_{fila_tesela}_{columna_tesela}.npy')
+        tesela = np.load(ruta)
+        filas, columnas = self._rangos_tesela(fila_tesela, columna_tesela)
+        forma_esperada = (filas.stop - filas.start, columnas.stop - columnas.start)
+        if tesela.shape != forma_esperada:
+            raise ValueError(f"La tesela '{ruta}' tiene forma {tesela.shape}, se esperaba {forma_esperada}")
+        return tesela.astype(self._dtype, copy=False)
+
+    def _conviene_tesela(self, fila_tesela, columna_tesela, pares):
+        """
+        Indica si los 'pares' pedidos de una tesela se leen de la tesela completa
+        (en caché, en disco o casi toda pedida) o conviene calcularlos uno a uno.
+        """
+        return ((fila_tesela, columna_tesela) in self._cache or
+                (fila_tesela, columna_tesela) in self._teselas_en_disco or
+                (columna_tesela, fila_tesela) in self._teselas_en_disco or
+                pares >= self.min_pares_tesela)
+
+    def _calcular_pares(self, i, j):
+        """Calcula los costos de los pares (i[k], j[k]) con haversine × factor de combustible."""
+        self.calculos_directos += len(i)
+        km = distancia_haversine(self.latitudes[i], self.longitudes[i],
+                                 self.latitudes[j], self.longitudes[j])
+        return km * self.factor_combustible
+
+    def _calcular_tesela(self, fila_tesela, columna_tesela):
+        """Calcula una tesela con haversine × factor de combustible."""
+        filas, columnas = self._rangos_tesela(fila_tesela, columna_tesela)
+        km = distancia_haversine(self.latitudes[filas, np.newaxis], self.longitudes[filas, np.newaxis],
+                                 self.latitudes[np.newaxis, columnas], self.longitudes[np.newaxis, columnas])
+        return (km * self.factor_combustible).astype(self._dtype)
+
+    # --- Acceso (misma interfaz que MatrizCostos) ---
+
+    def __getitem__(self, indices):
+        """Devuelve matriz[i, j]. 'i' y 'j' pueden ser enteros o arreglos."""
+        i, j = np.broadcast_arrays(*(np.asarray(v, dtype=np.intp) for v in indices))
+        t = self.tamano_tesela
+        i_plano = i.ravel()
+        j_plano = j.ravel()
+        claves = (i_plano // t) * self.num_teselas + (j_plano // t)
+        resultado = np.empty(i_plano.shape, dtype=self._dtype)
+
+        # Decidir por tesela si se lee la tesela completa o se calculan solo los pares pedidos
+        unicas, inversa, conteos = np.unique(claves, return_inverse=True, return_counts=True)
+        por_tesela = np.array([self._conviene_tesela(*divmod(int(clave), self.num_teselas), pares)
+                               for clave, pares in zip(unicas, conteos)], dtype=bool)
+        en_tesela = por_tesela[inversa.ravel()]
+
+        directos = np.flatnonzero(~en_tesela)
+        if len(directos) > 0:
+            resultado[directos] = self._calcular_pares(i_plano[directos], j_plano[directos])
+
+        # Agrupar las demás consultas por tesela para leer cada tesela una sola vez
+        restantes = np.flatnonzero(en_tesela)
+        orden = restantes[np.argsort(claves[restantes], kind='stable')]
+        unicas, inicios = np.unique(claves[orden], return_index=True)
+        for clave, grupo in zip(unicas, np.split(orden, inicios[1:])):
+            tesela = self._tesela(*divmod(int(clave), self.num_teselas))
+            resultado[grupo] = tesela[i_plano[grupo] % t, j_plano[grupo] % t]
+        return resultado.reshape(i.shape)[()]
+
+    def submatriz(self, nodos):
+        """
+        Materializa la matriz densa de un escenario (índices locales 0..k-1).
+        Un escenario sí cabe en memoria aunque la red completa no.
+        """
+        nodos = np.asarray(nodos)
+        datos = self[nodos[:, np.newaxis], nodos[np.newaxis, :]]
+        return MatrizCostos(np.ascontiguousarray(datos), len(nodos), nodos=nodos)
+
+    # --- Información ---
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por las teselas en caché, en bytes."""
+        return sum(tesela.nbytes for tesela in self._cache.values())
+
+    def __repr__(self):
+        return (f"ProveedorCostosPerezoso(n={self.n}, tesela={self.tamano_tesela}, "
+                f"en_cache={len(self._cache)}/{self.max_teselas}, en_disco={len(self._teselas_en_disco)})")
+
+
+if __name__ == '__main__':
+    # Comprobación rápida: rutas dispersas sobre una red nacional sin calcular
+    # teselas completas, y rutas repetidas que sí aprovechan el caché.
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(0)
+    n = 200_000
+    latitudes = rng.uniform(14.5, 32.7, n)
+    longitudes = rng.uniform(-117.1, -86.7, n)
+
+    proveedor = ProveedorCostosPerezoso(latitudes, longitudes, factor_combustible=0.15)
+    ruta = [0] + rng.choice(np.arange(1, n), 500, replace=False).tolist() + [0]
+    inicio = time.perf_counter()
+    costo = proveedor.costo_ruta(ruta)
+    print(f"Ruta dispersa de 500 tiendas (n={n}): {costo:.2f} en "
+          f"{(time.perf_counter() - inicio) * 1000:.1f} ms, {proveedor.calculos_directos} pares calculados")
+    assert proveedor.fallos == 0 and len(proveedor._cache) == 0
+
+    # Teselas explícitas en disco para los primeros 512 nodos (solo el triángulo superior)
+    with tempfile.TemporaryDirectory() as directorio:
+        for fila, col in [(0, 0), (0, 1), (1, 1)]:
+            np.save(os.path.join(directorio, f'tesela_{fila}_{col}.npy'),
+                    proveedor._calcular_tesela(fila, col))
+        en_disco = ProveedorCostosPerezoso(latitudes, longitudes, factor_combustible=0.15,
+                                           directorio_teselas=directorio)
+        ruta = [0] + rng.permutation(np.arange(1, 512)).tolist() + [0]
+        primera = en_disco.costo_ruta(ruta)
+        fallos = en_disco.fallos
+        segunda = en_disco.costo_ruta(ruta)
+        print(f"Ruta repetida sobre teselas en disco: {en_disco}, "
+              f"aciertos={en_disco.aciertos}, fallos={en_disco.fallos}")
+        assert fallos == 4 and en_disco.fallos == fallos and en_disco.aciertos >= fallos
+        assert np.isclose(primera, segunda) and np.isclose(primera, proveedor.costo_ruta(ruta))
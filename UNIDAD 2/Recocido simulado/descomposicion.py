@@ -0,0 +1,121 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from optimizador_sa import RecocidoSimulado
+
+
+def asignar_tiendas(matriz_costos, idx_cedis, idx_tiendas):
+    """
+    Asigna cada tienda al CEDIS con menor costo de ida y vuelta.
+
+    Args:
+        matriz_costos (MatrizCostos): Costos entre todos los nodos de la red.
+        idx_cedis (list): Índices de los centros de distribución.
+        idx_tiendas (list): Índices de las tiendas a repartir.
+
+    Returns:
+        dict: {indice_cedis: [indices de tiendas asignadas]}.
+    """
+    cedis = np.asarray(idx_cedis)
+    tiendas = np.asarray(idx_tiendas)
+
+    # Costo (CEDIS -> tienda -> CEDIS) para todas las combinaciones: forma (C, T)
+    costos = (matriz_costos[cedis[:, np.newaxis], tiendas[np.newaxis, :]] +
+              matriz_costos[tiendas[np.newaxis, :], cedis[:, np.newaxis]])
+    asignacion = np.argmin(costos, axis=0)
+
+    return {int(c): tiendas[asignacion == k].tolist() for k, c in enumerate(cedis)}
+
+
+def dividir_cluster(matriz_costos, idx_cedis, tiendas, max_tiendas):
+    """
+    Divide un cluster demasiado grande en grupos de a lo más 'max_tiendas'.
+
+    Las tiendas se ordenan con la heurística del vecino más cercano partiendo
+    del CEDIS y luego se cortan en tramos consecutivos, así cada grupo queda
+    formado por tiendas cercanas entre sí.
+
+    Returns:
+        list: Lista de grupos (listas de índices de tiendas).
+    """
+    if len(tiendas) <= max_tiendas:
+        return [list(tiendas)]
+
+    restantes = np.asarray(tiendas)
+    actual = idx_cedis
+    orden = []
+    while len(restantes) > 0:
+        k = int(np.argmin(matriz_costos[actual, restantes]))
+        actual = int(restantes[k])
+        orden.append(actual)
+        restantes = np.delete(restantes, k)
+
+    return [orden[i:i + max_tiendas] for i in range(0, len(orden), max_tiendas)]
+
+
+def _resolver_subproblema(matriz_escenario, temp_inicial, temp_final, tasa_enfriamiento, semilla):
+    """
+    Resuelve un cluster con Recocido Simulado (se ejecuta en un proceso aparte).
+    El nodo local 0 de 'matriz_escenario' es el CEDIS.
+
+    Returns:
+        tuple: (ruta con índices globales, costo).
+    """
+    random.seed(semilla)
+    tiendas_locales = list(range(1, matriz_escenario.n))
+    ruta_inicial = [0] + random.sample(tiendas_locales, len(tiendas_locales)) + [0]
+
+    # Con menos de 2 tiendas no hay vecinos que explorar: la ruta ya es óptima
+    if len(tiendas_locales) < 2:
+        return matriz_escenario.a_global(ruta_inicial), matriz_escenario.costo_ruta(ruta_inicial)
+
+    optimizador = RecocidoSimulado(matriz_escenario, temp_inicial, temp_final, tasa_enfriamiento)
+    ruta_optima, costo_optimo = optimizador.optimizar(ruta_inicial)
+    return matriz_escenario.a_global(ruta_optima), costo_optimo
+
+
+def resolver_red(matriz_costos, idx_cedis, idx_tiendas, temp_inicial, temp_final,
+                 tasa_enfriamiento, max_tiendas_por_ruta=None, procesos=None, semilla=None):
+    """
+    Resuelve toda la red con el enfoque "primero agrupar, después rutear":
+    1. Asigna cada tienda a un CEDIS.
+    2. Divide los clusters que superen 'max_tiendas_por_ruta' (opcional).
+    3. Optimiza cada cluster con Recocido Simulado, en paralelo.
+
+    Cada proceso recibe solo la sub-matriz de su cluster, no la red completa.
+
+    Args:
+        matriz_costos (MatrizCostos): Costos entre todos los nodos de la red.
+        idx_cedis (list): Índices de los centros de distribución.
+        idx_tiendas (list): Índices de las tiendas.
+        temp_inicial, temp_final, tasa_enfriamiento: Parámetros del Recocido Simulado.
+        max_tiendas_por_ruta (int): Tamaño máximo de cada subproblema (None = sin límite).
+        procesos (int): Número de procesos (None = número de CPUs).
+        semilla (int): Semilla base para reproducir los resultados.
+
+    Returns:
+        dict: {'rutas': [(cedis, ruta, costo), ...], 'costo_total': float}.
+    """
+    clusters = asignar_tiendas(matriz_costos, idx_cedis, idx_tiendas)
+
+    subproblemas = []
+    for cedis, tiendas in clusters.items():
+        if not tiendas:
+            continue
+        grupos = [tiendas] if max_tiendas_por_ruta is None else \
+            dividir_cluster(matriz_costos, cedis, tiendas, max_tiendas_por_ruta)
+        for grupo in grupos:
+            subproblemas.append((cedis, matriz_costos.submatriz([cedis] + list(grupo))))
+
+    semilla_base = random.randrange(2 ** 32) if semilla is None else semilla
+
+    with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+        futuros = [ejecutor.submit(_resolver_subproblema, matriz_escenario, temp_inicial,
+                                   temp_final, tasa_enfriamiento, semilla_base + k)
+                   for k, (_, matriz_escenario) in enumerate(subproblemas)]
+        resultados = [futuro.result() for futuro in futuros]
+
+    rutas = [(cedis, ruta, costo) for (cedis, _), (ruta, costo) in zip(subproblemas, resultados)]
+    return {'rutas': rutas, 'costo_total': float(sum(costo for _, _, costo in rutas))}
@@ -1,8 +1,11 @@
 import random
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
-from utils import cargar_datos, plot_ruta, plot_convergencia
+from utils import cargar_datos, cargar_datos_perezosos, plot_ruta, plot_convergencia
 from optimizador_sa import RecocidoSimulado
+from descomposicion import resolver_red
+from almacen_soluciones import AlmacenSoluciones, temperatura_arranque_caliente
 
 def main():
     print("🚀 Iniciando Proceso de Optimización de Rutas...")
@@ -10,6 +13,8 @@ def main():
     # --- 1. Carga de Datos ---
     RUTA_TIENDAS = 'data/datos_distribucion_tiendas.xlsx - Sheet1.csv'
     RUTA_COSTOS = 'data/matriz_costos_combustible.xlsx - Sheet1.csv'
+    # Rutas de corridas anteriores, para reoptimizar sin empezar de cero
+    RUTA_SOLUCIONES = 'data/soluciones_previas.json'
     
     df_tiendas, matriz_costos = cargar_datos(RUTA_TIENDAS, RUTA_COSTOS)
     if df_tiendas is None:
@@ -32,24 +37,55 @@ def main():
     nodos_problema_idx = [idx_cedis] + idx_tiendas_objetivo
     df_nodos_problema = df_tiendas.iloc[nodos_problema_idx]
 
-    # --- 3. Crear una Ruta Inicial Aleatoria ---
-    # La ruta debe empezar y terminar en el CEDIS
-    ruta_inicial = [idx_cedis] + random.sample(idx_tiendas_objetivo, len(idx_tiendas_objetivo)) + [idx_cedis]
+    # Sub-matriz del escenario con índices locales compactos (0 = CEDIS).
+    # El optimizador trabaja sobre este bloque pequeño en lugar de la matriz completa.
+    matriz_escenario = matriz_costos.submatriz(nodos_problema_idx)
+
+    # --- 3. Crear la Ruta Inicial ---
+    # La ruta debe empezar y terminar en el CEDIS.
+    # Si ya se resolvió un escenario parecido, se repara esa ruta (quitando las
+    # tiendas que salieron e insertando las nuevas); si no, se crea al azar.
+    # Los nodos se guardan por 'Nombre' para no depender de la posición en el CSV.
+    almacen = AlmacenSoluciones(RUTA_SOLUCIONES)
+    nombres_nodos = df_nodos_problema['Nombre'].tolist()
+    ruta_inicial_local = almacen.ruta_inicial(nombres_nodos[0], nombres_nodos[1:], matriz_escenario)
+
+    arranque_en_caliente = ruta_inicial_local is not None
+    if arranque_en_caliente:
+        origen_ruta_inicial = 'Reparada'
+        print("♻️  Se encontró una solución previa: se usará como punto de partida.")
+    else:
+        origen_ruta_inicial = 'Aleatoria'
+        tiendas_locales = list(range(1, len(nodos_problema_idx)))
+        ruta_inicial_local = [0] + random.sample(tiendas_locales, len(tiendas_locales)) + [0]
+    ruta_inicial = matriz_escenario.a_global(ruta_inicial_local)
 
     # --- 4. Configurar y Ejecutar el Optimizador ---
     # Parámetros del Recocido Simulado (puedes experimentar con estos valores)
     TEMP_INICIAL = 10000
     TEMP_FINAL = 0.1
     TASA_ENFRIAMIENTO = 0.995 # Un enfriamiento más lento suele dar mejores resultados
+    # Partiendo de una buena ruta se enfría desde la escala de costos del escenario
+    # (este múltiplo del cambio promedio de un vecino 2-opt) para no "olvidarla"
+    FACTOR_TEMP_CALIENTE = 1.0
 
-    optimizador = RecocidoSimulado(matriz_costos, TEMP_INICIAL, TEMP_FINAL, TASA_ENFRIAMIENTO)
+    if arranque_en_caliente:
+        temp_inicial = temperatura_arranque_caliente(ruta_inicial_local, matriz_escenario,
+                                                     factor=FACTOR_TEMP_CALIENTE)
+        print(f"🌡️  Temperatura inicial (arranque en caliente): {temp_inicial:.3f}")
+    else:
+        temp_inicial = TEMP_INICIAL
+    optimizador = RecocidoSimulado(matriz_escenario, temp_inicial, TEMP_FINAL, TASA_ENFRIAMIENTO)
     
-    costo_inicial = optimizador.calcular_costo_ruta(ruta_inicial)
+    costo_inicial = optimizador.calcular_costo_ruta(ruta_inicial_local)
     
     print("\njecutando Recocido Simulado... (esto puede tardar unos segundos)")
-    ruta_optima, costo_optimo = optimizador.optimizar(ruta_inicial)
+    ruta_optima_local, costo_optimo = optimizador.optimizar(ruta_inicial_local)
+    ruta_optima = matriz_escenario.a_global(ruta_optima_local)
     print("Optimización completada.")
 
+    almacen.guardar(nombres_nodos[0], [nombres_nodos[i] for i in ruta_optima_local], costo_optimo)
+
     # --- 5. Mostrar Resultados ---
     print("\n--- Resultados de la Optimización ---")
     print(f"Ruta Inicial: {ruta_inicial}")
@@ -64,7 +100,7 @@ def main():
     fig, axes = plt.subplots(1, 2, figsize=(18, 8))
     fig.suptitle('Comparación de Rutas de Distribución', fontsize=16)
     
-    plot_ruta(df_tiendas, ruta_inicial, f'Ruta Inicial Aleatoria (Costo: {costo_inicial:.2f})', axes[0])
+    plot_ruta(df_tiendas, ruta_inicial, f'Ruta Inicial {origen_ruta_inicial} (Costo: {costo_inicial:.2f})', axes[0])
     plot_ruta(df_tiendas, ruta_optima, f'Ruta Optimizada (Costo: {costo_optimo:.2f})', axes[1])
     
     plt.show()
@@ -73,5 +109,63 @@ def main():
     plot_convergencia(optimizador.historial_costos)
 
 
+def main_red(perezoso=False):
+    """
+    Resuelve TODA la red: asigna cada tienda a un CEDIS y optimiza
+    cada cluster en paralelo (primero agrupar, después rutear).
+
+    Args:
+        perezoso (bool): Calcular los costos bajo demanda (haversine × factor de
+            combustible) en lugar de cargar la matriz completa; sirve para redes
+            que no caben en memoria. Son costos ESTIMADOS, no los de la matriz real.
+    """
+    print("🚀 Iniciando Optimización de la Red Completa...")
+
+    RUTA_TIENDAS = 'data/datos_distribucion_tiendas.xlsx - Sheet1.csv'
+    RUTA_COSTOS = 'data/matriz_costos_combustible.xlsx - Sheet1.csv'
+    # Para costos bajo demanda
+    DIRECTORIO_TESELAS = 'data/teselas_costos'  # Teselas explícitas de la matriz (opcional)
+    FACTOR_COMBUSTIBLE = 0.15  # Costo por km (aprox. la mediana de la matriz de ejemplo)
+
+    if perezoso:
+        print(f"⚠️  Modo perezoso: se usan costos ESTIMADOS (haversine × {FACTOR_COMBUSTIBLE} por km), "
+              f"no la matriz '{RUTA_COSTOS}'. Solo las teselas de '{DIRECTORIO_TESELAS}' son costos reales.")
+        df_tiendas, matriz_costos = cargar_datos_perezosos(RUTA_TIENDAS, FACTOR_COMBUSTIBLE,
+                                                           directorio_teselas=DIRECTORIO_TESELAS)
+    else:
+        df_tiendas, matriz_costos = cargar_datos(RUTA_TIENDAS, RUTA_COSTOS)
+    if df_tiendas is None:
+        return
+
+    idx_cedis = df_tiendas.index[df_tiendas['Tipo'] == 'Centro de Distribución'].tolist()
+    idx_tiendas = df_tiendas.index[df_tiendas['Tipo'] == 'Tienda'].tolist()
+    print(f"\n🚚 Red: {len(idx_cedis)} CEDIS y {len(idx_tiendas)} tiendas.")
+
+    # Parámetros del Recocido Simulado (los mismos para cada cluster)
+    TEMP_INICIAL = 10000
+    TEMP_FINAL = 0.1
+    TASA_ENFRIAMIENTO = 0.995
+    # Los clusters más grandes se dividen en rutas de a lo más este número de tiendas
+    MAX_TIENDAS_POR_RUTA = 30
+
+    print("\nEjecutando Recocido Simulado por cluster en paralelo...")
+    resultado = resolver_red(matriz_costos, idx_cedis, idx_tiendas,
+                             TEMP_INICIAL, TEMP_FINAL, TASA_ENFRIAMIENTO,
+                             max_tiendas_por_ruta=MAX_TIENDAS_POR_RUTA)
+    print("Optimización completada.")
+
+    print("\n--- Resultados por Ruta ---")
+    for cedis, ruta, costo in resultado['rutas']:
+        print(f"{df_tiendas.loc[cedis, 'Nombre']}: {len(ruta) - 2} tiendas, Costo: {costo:.2f}")
+    print("-" * 35)
+    print(f"Rutas: {len(resultado['rutas'])}")
+    print(f"Costo Total de la Red: {resultado['costo_total']:.2f} unidades monetarias")
+
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # 'python main.py --red' resuelve toda la red ('--perezoso' calcula los costos bajo demanda);
+    # sin argumentos, el escenario de ejemplo
+    if '--red' in sys.argv[1:]:
+        main_red(perezoso='--perezoso' in sys.argv[1:])
+    else:
+        main()
\ No newline at end of file
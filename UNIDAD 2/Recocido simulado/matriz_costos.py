@@ -0,0 +1,158 @@
+import numpy as np
+
+
+class MatrizCostos:
+    """
+    Matriz de costos compacta compartida por el Recocido Simulado y el
+    Algoritmo Genético.
+
+    Permite:
+    - Guardar los costos en float32 (la mitad de memoria que float64).
+    - Guardar solo el triángulo superior cuando la métrica es simétrica
+      (otra mitad de memoria: N*(N+1)/2 valores en lugar de N*N).
+    - Extraer sub-matrices de un escenario con índices locales compactos
+      (0..k-1), para que los ciclos del optimizador trabajen sobre un
+      bloque pequeño y contiguo en memoria.
+
+    Se indexa igual que un np.array: matriz[i, j] (escalares o arreglos).
+    """
+
+    def __init__(self, datos, n, empaquetada=False, nodos=None):
+        """
+        Inicializa la matriz. Normalmente se usan los constructores
+        'desde_densa' o 'desde_coordenadas' en lugar de llamar a este.
+
+        Args:
+            datos (np.array): Matriz N×N, o vector N*(N+1)/2 si está empaquetada.
+            n (int): Número de nodos.
+            empaquetada (bool): Si 'datos' es el triángulo superior empaquetado.
+            nodos (np.array): Índices globales de cada nodo local (para sub-matrices).
+        """
+        self.datos = datos
+        self.n = int(n)
+        self.empaquetada = empaquetada
+        self.nodos = np.arange(self.n) if nodos is None else np.asarray(nodos)
+
+    # --- Constructores ---
+
+    @classmethod
+    def desde_densa(cls, matriz, dtype=np.float64, empaquetar=False):
+        """
+        Crea la matriz a partir de un arreglo N×N (ej. el leído por 'cargar_datos').
+
+        Args:
+            matriz (np.array): Matriz de costos cuadrada.
+            dtype: Tipo de dato de almacenamiento (np.float64 o np.float32).
+            empaquetar (bool): Guardar solo el triángulo superior. La matriz
+                debe ser simétrica.
+        """
+        matriz = np.asarray(matriz)
+        if matriz.ndim != 2 or matriz.shape[0] != matriz.shape[1]:
+            raise ValueError(f"La matriz de costos debe ser cuadrada, se recibió {matriz.shape}")
+        n = matriz.shape[0]
+
+        if not empaquetar:
+            return cls(np.ascontiguousarray(matriz, dtype=dtype), n)
+
+        if not np.allclose(matriz, matriz.T, equal_nan=True):
+            raise ValueError("Solo se puede empaquetar una matriz de costos simétrica")
+        filas, columnas = np.triu_indices(n)
+        return cls(matriz[filas, columnas].astype(dtype), n, empaquetada=True)
+
+    @classmethod
+    def desde_coordenadas(cls, coordenadas, dtype=np.float64, empaquetar=True):
+        """
+        Crea una matriz de distancias euclidianas a partir de coordenadas (N, 2).
+        Se calcula fila por fila para no crear temporales N×N en float64.
+        """
+        coordenadas = np.asarray(coordenadas, dtype=np.float64)
+        n = len(coordenadas)
+
+        if not empaquetar:
+            datos = np.empty((n, n), dtype=dtype)
+            for i in range(n):
+                datos[i] = np.linalg.norm(coordenadas - coordenadas[i], axis=1)
+            return cls(datos, n)
+
+        datos = np.empty(n * (n + 1) // 2, dtype=dtype)
+        for i in range(n):
+            inicio = cls._indice_empaquetado(i, i, n)
+            datos[inicio:inicio + n - i] = np.linalg.norm(coordenadas[i:] - coordenadas[i], axis=1)
+        return cls(datos, n, empaquetada=True)
+
+    # --- Acceso ---
+
+    @staticmethod
+    def _indice_empaquetado(i, j, n):
+        """Posición de (i, j), con i <= j, dentro del triángulo superior empaquetado."""
+        return i * (2 * n - i - 1) // 2 + j
+
+    def __getitem__(self, indices):
+        """Devuelve matriz[i, j]. 'i' y 'j' pueden ser enteros o arreglos."""
+        i, j = indices
+        if not self.empaquetada:
+            return self.datos[i, j]
+        i = np.asarray(i)
+        j = np.asarray(j)
+        menor = np.minimum(i, j)
+        mayor = np.maximum(i, j)
+        return self.datos[self._indice_empaquetado(menor, mayor, self.n)]
+
+    def costo_ruta(self, ruta, cerrada=False):
+        """
+        Suma los costos de los tramos consecutivos de la ruta (vectorizado).
+
+        Args:
+            ruta (list): Índices de nodos en orden de visita.
+            cerrada (bool): Si se suma también el tramo del último nodo al primero.
+        """
+        ruta = np.asarray(ruta)
+        if len(ruta) < 2:
+            return 0.0
+        destinos = np.roll(ruta, -1) if cerrada else ruta[1:]
+        origenes = ruta if cerrada else ruta[:-1]
+        # Se acumula en float64 aunque se almacene en float32
+        return float(np.sum(self[origenes, destinos], dtype=np.float64))
+
+    def submatriz(self, nodos):
+        """
+        Extrae la matriz de un escenario con índices locales compactos.
+
+        El nodo local k corresponde al nodo nodos[k] de esta matriz; la
+        sub-matriz conserva el tipo de dato y el empaquetado.
+        """
+        nodos = np.asarray(nodos)
+        k = len(nodos)
+        if not self.empaquetada:
+            datos = np.ascontiguousarray(self.datos[np.ix_(nodos, nodos)])
+            return MatrizCostos(datos, k, nodos=self.nodos[nodos])
+
+        filas, columnas = np.triu_indices(k)
+        datos = self[nodos[filas], nodos[columnas]]
+        return MatrizCostos(datos, k, empaquetada=True, nodos=self.nodos[nodos])
+
+    def a_global(self, ruta_local):
+        """Convierte una ruta con índices locales a índices globales."""
+        return [int(self.nodos[i]) for i in ruta_local]
+
+    # --- Información ---
+
+    @property
+    def shape(self):
+        return (self.n, self.n)
+
+    @property
+    def dtype(self):
+        return self.datos.dtype
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por los costos, en bytes."""
+        return self.datos.nbytes
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        tipo = "empaquetada" if self.empaquetada else "densa"
+        return f"MatrizCostos(n={self.n}, {tipo}, dtype={self.dtype})"
@@ -1,6 +1,8 @@
 import numpy as np
 import random
 
+from matriz_costos import MatrizCostos
+
 class RecocidoSimulado:
     """
     Clase que implementa el algoritmo de Recocido Simulado para resolver el VRP.
@@ -10,11 +12,14 @@ class RecocidoSimulado:
         Inicializa el optimizador.
 
         Args:
-            matriz_costos (np.array): Matriz de costos entre nodos.
+            matriz_costos (MatrizCostos o np.array): Matriz de costos entre nodos.
+                Si se pasa un np.array se envuelve en una MatrizCostos densa.
             temp_inicial (float): Temperatura inicial del sistema.
             temp_final (float): Temperatura final (criterio de parada).
             tasa_enfriamiento (float): Tasa con la que disminuye la temperatura (e.g., 0.99).
         """
+        if isinstance(matriz_costos, np.ndarray):
+            matriz_costos = MatrizCostos.desde_densa(matriz_costos)
         self.matriz_costos = matriz_costos
         self.temp_inicial = temp_inicial
         self.temp_final = temp_final
@@ -23,10 +28,7 @@ class RecocidoSimulado:
 
     def calcular_costo_ruta(self, ruta):
         """Calcula el costo total de una ruta."""
-        costo_total = 0
-        for i in range(len(ruta) - 1):
-            costo_total += self.matriz_costos[ruta[i], ruta[i+1]]
-        return costo_total
+        return self.matriz_costos.costo_ruta(ruta)
 
     def generar_vecino(self, ruta):
         """
@@ -42,12 +44,15 @@ class RecocidoSimulado:
         vecino[i:j+1] = reversed(vecino[i:j+1])
         return vecino
 
-    def optimizar(self, ruta_inicial):
+    def optimizar(self, ruta_inicial, al_progresar=None, cada=100):
         """
         Ejecuta el algoritmo de Recocido Simulado.
 
         Args:
             ruta_inicial (list): La primera ruta a evaluar.
+            al_progresar (callable): Función opcional que recibe
+                (iteracion, mejor_costo, mejor_solucion) cada 'cada' iteraciones.
+            cada (int): Cada cuántas iteraciones se llama a 'al_progresar'.
 
         Returns:
             tuple: La mejor ruta encontrada y su costo.
@@ -60,6 +65,7 @@ class RecocidoSimulado:
         mejor_costo = costo_actual
         
         self.historial_costos.append(costo_actual)
+        iteracion = 0
 
         while temp_actual > self.temp_final:
             # Generar una solución vecina
@@ -81,6 +87,10 @@ class RecocidoSimulado:
             
             self.historial_costos.append(mejor_costo)
             
+            iteracion += 1
+            if al_progresar is not None and iteracion % cada == 0:
+                al_progresar(iteracion, mejor_costo, mejor_solucion)
+            
             # Enfriar el sistema
             temp_actual *= self.tasa_enfriamiento
             
@@ -0,0 +1,475 @@
+"""
+Servicio local de optimización de rutas.
+
+Un proceso de larga duración que recibe trabajos por HTTP (asyncio) y los
+resuelve en un grupo de procesos "calientes" que ya tienen los datos cargados.
+Los resultados se guardan en caché por huella de la instancia + parámetros,
+así que repetir una petición devuelve el resultado al instante.
+
+Uso:
+    python servicio.py --puerto 8765
+
+    curl -X POST localhost:8765/trabajos -d '{"escenario": {"cedis": "Centro de Distribución 2", "nivel": "A"},
+                                              "optimizador": "sa", "presupuesto": 5000, "semilla": 1}'
+    curl localhost:8765/trabajos/<id>            # Estado y resultado
+    curl localhost:8765/trabajos/<id>/progreso   # Progreso en vivo (una línea JSON por avance)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import random
+import sys
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd # type: ignore
+
+from utils import cargar_datos
+from optimizador_sa import RecocidoSimulado
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "UNIDAD 3" / "AG"))
+from AG import AlgoritmoGeneticoTSP, Municipio  # noqa: E402
+
+RUTA_TIENDAS = 'data/datos_distribucion_tiendas.xlsx - Sheet1.csv'
+RUTA_COSTOS = 'data/matriz_costos_combustible.xlsx - Sheet1.csv'
+
+# Parámetros fijos del Recocido Simulado; el presupuesto define la tasa de enfriamiento
+TEMP_INICIAL = 10000
+TEMP_FINAL = 0.1
+
+OPTIMIZADORES = ('sa', 'ag')
+# Parámetros del Algoritmo Genético que se usan si el trabajo no los indica
+PARAMETROS_AG = {'tamano_poblacion': 100, 'tamano_elite': 20, 'tasa_mutacion': 0.01}
+ESTADOS_FINALES = ('terminado', 'error')
+
+
+# --- 1. Lado del Trabajador (procesos del pool) ---
+
+# Datos cargados una sola vez por proceso trabajador
+_df_tiendas = None
+_matriz_costos = None
+
+
+def _iniciar_trabajador(ruta_tiendas, ruta_costos):
+    """Carga los datos al arrancar cada proceso del pool."""
+    global _df_tiendas, _matriz_costos
+    _df_tiendas, _matriz_costos = cargar_datos(ruta_tiendas, ruta_costos)
+
+
+def _listo():
+    """Tarea vacía para forzar el arranque (y la carga de datos) de los trabajadores."""
+    return _df_tiendas is not None
+
+
+def _es_entero(valor):
+    """True si es un entero de JSON (bool es subclase de int, pero no cuenta)."""
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def _nodos_escenario(df_tiendas, escenario):
+    """
+    Devuelve [CEDIS] + tiendas del escenario (índices globales).
+    Las tiendas repetidas y el propio CEDIS se quitan de la lista de tiendas.
+    Lanza ValueError si el escenario no es válido.
+    """
+    if not isinstance(escenario['cedis'], str):
+        raise ValueError("'escenario.cedis' debe ser el nombre del CEDIS (texto)")
+    idx_cedis = df_tiendas.index[df_tiendas['Nombre'] == escenario['cedis']].tolist()
+    if not idx_cedis:
+        raise ValueError(f"No existe el CEDIS '{escenario['cedis']}'")
+
+    if 'tiendas' in escenario:
+        idx_tiendas = escenario['tiendas']
+        if not isinstance(idx_tiendas, list) or not all(_es_entero(t) for t in idx_tiendas):
+            raise ValueError("'escenario.tiendas' debe ser una lista de índices enteros")
+        fuera_de_rango = [t for t in idx_tiendas if not 0 <= t < len(df_tiendas)]
+        if fuera_de_rango:
+            raise ValueError(f"Índices de tienda fuera de rango: {fuera_de_rango}")
+    else:
+        nivel = escenario.get('nivel', 'A')
+        if not isinstance(nivel, str):
+            raise ValueError("'escenario.nivel' debe ser un texto (ej. 'A')")
+        idx_tiendas = df_tiendas.index[df_tiendas['Nivel_Tienda'] == nivel].tolist()
+
+    idx_tiendas = [t for t in dict.fromkeys(idx_tiendas) if t != idx_cedis[0]]
+    if len(idx_tiendas) < 2:
+        raise ValueError("El escenario necesita al menos 2 tiendas")
+    return [idx_cedis[0]] + idx_tiendas
+
+
+def _ruta_desde_cedis(indices):
+    """Rota un ciclo del AG para que empiece y termine en el CEDIS (nodo local 0)."""
+    inicio = indices.index(0)
+    return indices[inicio:] + indices[:inicio] + [0]
+
+
+def _ejecutar_trabajo(id_trabajo, parametros, cola_progreso):
+    """
+    Resuelve un trabajo dentro de un proceso del pool.
+    El progreso se envía a 'cola_progreso' como (id_trabajo, iteracion, mejor_costo, mejor_ruta).
+    'mejor_ruta' (índices globales) solo se envía cuando el mejor costo cambia; si no, va None.
+    """
+    if _df_tiendas is None:
+        raise RuntimeError("El trabajador no pudo cargar los datos")
+
+    random.seed(parametros.get('semilla'))
+    nodos = _nodos_escenario(_df_tiendas, parametros['escenario'])
+    matriz_escenario = _matriz_costos.submatriz(nodos)
+    presupuesto = parametros['presupuesto']
+
+    ultimo_costo = None
+
+    def reportar(iteracion, mejor_costo, mejor_ruta_local):
+        nonlocal ultimo_costo
+        mejor_ruta = None
+        if mejor_costo != ultimo_costo:
+            ultimo_costo = mejor_costo
+            mejor_ruta = matriz_escenario.a_global(mejor_ruta_local)
+        cola_progreso.put((id_trabajo, iteracion, float(mejor_costo), mejor_ruta))
+
+    if parametros['optimizador'] == 'sa':
+        # Se elige la tasa para que el enfriamiento dure 'presupuesto' iteraciones
+        tasa_enfriamiento = (TEMP_FINAL / TEMP_INICIAL) ** (1.0 / presupuesto)
+        tiendas_locales = list(range(1, len(nodos)))
+        ruta_inicial = [0] + random.sample(tiendas_locales, len(tiendas_locales)) + [0]
+
+        optimizador = RecocidoSimulado(matriz_escenario, TEMP_INICIAL, TEMP_FINAL, tasa_enfriamiento)
+        ruta_local, costo = optimizador.optimizar(ruta_inicial, al_progresar=reportar)
+    else:
+        coordenadas = _df_tiendas.iloc[nodos][['Longitud_WGS84', 'Latitud_WGS84']].values
+        municipios = [Municipio(x=lon, y=lat) for lon, lat in coordenadas]
+        ag_tsp = AlgoritmoGeneticoTSP(municipios,
+                                      tamano_poblacion=parametros['tamano_poblacion'],
+                                      tamano_elite=parametros['tamano_elite'],
+                                      tasa_mutacion=parametros['tasa_mutacion'],
+                                      matriz_costos=matriz_escenario)
+
+        def reportar_ag(generacion, ruta):
+            reportar(generacion, ruta.calcular_distancia(), _ruta_desde_cedis(ag_tsp.indices_de(ruta)))
+
+        mejor_ruta = ag_tsp.ejecutar(presupuesto, al_progresar=reportar_ag)
+
+        # El AG devuelve un ciclo; se rota para que empiece y termine en el CEDIS
+        ruta_local = _ruta_desde_cedis(ag_tsp.indices_de(mejor_ruta))
+        costo = matriz_escenario.costo_ruta(ruta_local)
+
+    return {'ruta': matriz_escenario.a_global(ruta_local), 'costo': float(costo)}
+
+
+# --- 2. Lado del Servicio (proceso principal, asyncio) ---
+
+def _huella_archivos(*rutas):
+    """Huella SHA-256 del contenido de los archivos de datos (define la instancia)."""
+    huella = hashlib.sha256()
+    for ruta in rutas:
+        with open(ruta, 'rb') as f:
+            for bloque in iter(lambda: f.read(1 << 20), b''):
+                huella.update(bloque)
+    return huella.hexdigest()
+
+
+def _validar(parametros, df_tiendas):
+    """Valida un trabajo antes de encolarlo. Lanza ValueError si no es válido."""
+    if not isinstance(parametros, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+    escenario = parametros.get('escenario')
+    if not isinstance(escenario, dict) or 'cedis' not in escenario:
+        raise ValueError("Falta 'escenario' con la clave 'cedis'")
+    _nodos_escenario(df_tiendas, escenario)
+    if parametros.get('optimizador') not in OPTIMIZADORES:
+        raise ValueError(f"'optimizador' debe ser uno de {OPTIMIZADORES}")
+    presupuesto = parametros.get('presupuesto')
+    if not _es_entero(presupuesto) or presupuesto <= 0:
+        raise ValueError("'presupuesto' debe ser un entero positivo")
+    semilla = parametros.get('semilla')
+    if semilla is not None and not _es_entero(semilla):
+        raise ValueError("'semilla' debe ser un entero")
+
+    parametros = dict(parametros)
+    if parametros['optimizador'] == 'ag':
+        # Se completan los valores por defecto para que también formen parte de la clave de caché
+        for nombre, valor in PARAMETROS_AG.items():
+            parametros.setdefault(nombre, valor)
+        poblacion = parametros['tamano_poblacion']
+        if not _es_entero(poblacion) or poblacion <= 0:
+            raise ValueError("'tamano_poblacion' debe ser un entero positivo")
+        elite = parametros['tamano_elite']
+        if not _es_entero(elite) or not 0 <= elite <= poblacion:
+            raise ValueError(f"'tamano_elite' debe ser un entero entre 0 y tamano_poblacion ({poblacion})")
+        tasa = parametros['tasa_mutacion']
+        if isinstance(tasa, bool) or not isinstance(tasa, (int, float)) or not 0 <= tasa <= 1:
+            raise ValueError("'tasa_mutacion' debe ser un número entre 0 y 1")
+    return parametros
+
+
+class ServicioRutas:
+    """
+    Recibe trabajos, los encola en el pool de procesos y guarda su estado.
+
+    Los trabajos idénticos (misma clave de caché) que llegan mientras uno ya se
+    está ejecutando no se vuelven a ejecutar: esperan el resultado de ese.
+    """
+
+    def __init__(self, ruta_tiendas=RUTA_TIENDAS, ruta_costos=RUTA_COSTOS, procesos=None,
+                 max_cache=256, max_trabajos_terminados=1000):
+        """
+        Args:
+            ruta_tiendas (str): CSV con la información de las tiendas.
+            ruta_costos (str): CSV con la matriz de costos de combustible.
+            procesos (int): Tamaño del pool (None = número de CPUs).
+            max_cache (int): Resultados que se guardan en caché (se expulsa el menos usado).
+            max_trabajos_terminados (int): Trabajos terminados que se pueden seguir
+                consultando (se olvidan los más antiguos).
+        """
+        self.huella_datos = _huella_archivos(ruta_tiendas, ruta_costos)
+        # Las tiendas también se cargan aquí para validar los trabajos antes de encolarlos
+        self.df_tiendas = pd.read_csv(ruta_tiendas)
+        self.procesos = procesos or multiprocessing.cpu_count()
+        self.max_cache = max_cache
+        self.max_trabajos_terminados = max_trabajos_terminados
+        self.trabajos = {}
+        self.cache = OrderedDict()
+        self._terminados = deque()  # IDs de los trabajos terminados, del más antiguo al más reciente
+        # Ejecuciones en curso: {id de la ejecución: [trabajos que esperan su resultado]}
+        self._ejecuciones = {}
+        self._en_curso = {}  # {clave de caché: id de la ejecución}
+
+        self._administrador = multiprocessing.Manager()
+        self._cola_progreso = self._administrador.Queue()
+        self._ejecutor = ProcessPoolExecutor(max_workers=self.procesos,
+                                             initializer=_iniciar_trabajador,
+                                             initargs=(ruta_tiendas, ruta_costos))
+        self._cambio = None
+        self._tareas = set()
+
+    async def iniciar(self):
+        """Arranca los trabajadores (carga de datos) y la retransmisión del progreso."""
+        self._cambio = asyncio.Condition()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self._ejecutor, _listo)
+                               for _ in range(self.procesos)])
+        self._lanzar(self._retransmitir_progreso())
+
+    def cerrar(self):
+        """Detiene el pool de procesos y la cola de progreso."""
+        self._cola_progreso.put(None)
+        self._ejecutor.shutdown(cancel_futures=True)
+        self._administrador.shutdown()
+
+    def _lanzar(self, corrutina):
+        """Crea una tarea y guarda la referencia para que no se recolecte."""
+        tarea = asyncio.create_task(corrutina)
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+    # --- Trabajos ---
+
+    def clave_cache(self, parametros):
+        """Huella de instancia + parámetros. Sin semilla el resultado no es reproducible."""
+        if parametros.get('semilla') is None:
+            return None
+        texto = json.dumps(parametros, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256((self.huella_datos + texto).encode('utf-8')).hexdigest()
+
+    async def enviar(self, parametros):
+        """
+        Registra un trabajo. Si ya está en caché se devuelve terminado; si uno
+        idéntico se está ejecutando, se une a esa ejecución.
+        """
+        parametros = _validar(parametros, self.df_tiendas)
+        clave = self.clave_cache(parametros)
+        trabajo = {
+            'id': uuid.uuid4().hex,
+            'parametros': parametros,
+            'estado': 'en_cola',
+            'iteracion': 0,
+            'mejor_costo': None,
+            'mejor_ruta': None,
+            'resultado': None,
+            'error': None,
+            'en_cache': False,
+            'version': 0,
+        }
+        self.trabajos[trabajo['id']] = trabajo
+
+        if clave is not None and clave in self.cache:
+            self.cache.move_to_end(clave)
+            resultado = self.cache[clave]
+            trabajo.update(estado='terminado', en_cache=True, resultado=resultado,
+                           mejor_costo=resultado['costo'], mejor_ruta=resultado['ruta'])
+            self._terminar([trabajo])
+        elif clave is not None and clave in self._en_curso:
+            # Se sigue la ejecución idéntica que ya está en curso, desde su avance actual
+            grupo = self._ejecuciones[self._en_curso[clave]]
+            trabajo.update({k: grupo[0][k] for k in ('estado', 'iteracion', 'mejor_costo', 'mejor_ruta')})
+            grupo.append(trabajo)
+        else:
+            # Se registra antes de cualquier 'await' para que un trabajo idéntico la encuentre
+            self._ejecuciones[trabajo['id']] = [trabajo]
+            if clave is not None:
+                self._en_curso[clave] = trabajo['id']
+            self._lanzar(self._correr(trabajo['id'], parametros, clave))
+        return trabajo
+
+    async def _correr(self, id_ejecucion, parametros, clave):
+        """Ejecuta el trabajo en el pool y pasa el resultado a todos los que lo esperan."""
+        loop = asyncio.get_running_loop()
+        try:
+            resultado = await loop.run_in_executor(self._ejecutor, _ejecutar_trabajo, id_ejecucion,
+                                                   parametros, self._cola_progreso)
+        except Exception as e:
+            cambios = {'estado': 'error', 'error': str(e)}
+        else:
+            if clave is not None:
+                self._guardar_en_cache(clave, resultado)
+            cambios = {'estado': 'terminado', 'resultado': resultado,
+                       'mejor_costo': resultado['costo'], 'mejor_ruta': resultado['ruta']}
+
+        if clave is not None:
+            del self._en_curso[clave]
+        grupo = self._ejecuciones.pop(id_ejecucion)
+        await self._actualizar(grupo, **cambios)
+        self._terminar(grupo)
+
+    def _guardar_en_cache(self, clave, resultado):
+        """Guarda un resultado y expulsa el menos usado si se pasa de 'max_cache'."""
+        self.cache[clave] = resultado
+        self.cache.move_to_end(clave)
+        while len(self.cache) > self.max_cache:
+            self.cache.popitem(last=False)
+
+    def _terminar(self, trabajos):
+        """Registra trabajos terminados y olvida los más antiguos si hay demasiados."""
+        self._terminados.extend(trabajo['id'] for trabajo in trabajos)
+        while len(self._terminados) > self.max_trabajos_terminados:
+            del self.trabajos[self._terminados.popleft()]
+
+    async def _retransmitir_progreso(self):
+        """Pasa los avances que envían los trabajadores al estado de cada trabajo."""
+        loop = asyncio.get_running_loop()
+        while True:
+            mensaje = await loop.run_in_executor(None, self._cola_progreso.get)
+            if mensaje is None:
+                break
+            id_ejecucion, iteracion, mejor_costo, mejor_ruta = mensaje
+            grupo = self._ejecuciones.get(id_ejecucion)
+            if grupo is not None:
+                cambios = {'estado': 'ejecutando', 'iteracion': iteracion, 'mejor_costo': mejor_costo}
+                if mejor_ruta is not None:
+                    cambios['mejor_ruta'] = mejor_ruta
+                await self._actualizar(grupo, **cambios)
+
+    async def _actualizar(self, trabajos, **cambios):
+        """Modifica trabajos y avisa a quien esté transmitiendo su progreso."""
+        async with self._cambio:
+            for trabajo in trabajos:
+                trabajo.update(cambios)
+                trabajo['version'] += 1
+            self._cambio.notify_all()
+
+    # --- HTTP ---
+
+    async def atender(self, lector, escritor):
+        """Atiende una conexión HTTP/1.1 (una petición por conexión)."""
+        try:
+            linea = await lector.readline()
+            metodo, ruta, _ = linea.decode('latin-1').split(' ', 2)
+            encabezados = {}
+            while True:
+                linea = await lector.readline()
+                if linea in (b'\r\n', b'\n', b''):
+                    break
+                nombre, _, valor = linea.decode('latin-1').partition(':')
+                encabezados[nombre.strip().lower()] = valor.strip()
+            cuerpo = await lector.readexactly(int(encabezados.get('content-length', 0)))
+
+            partes = [p for p in ruta.split('?')[0].split('/') if p]
+            if metodo == 'POST' and partes == ['trabajos']:
+                trabajo = await self.enviar(json.loads(cuerpo or b'{}'))
+                await self._responder(escritor, 200 if trabajo['en_cache'] else 202, self._vista(trabajo))
+            elif metodo == 'GET' and len(partes) in (2, 3) and partes[0] == 'trabajos':
+                trabajo = self.trabajos.get(partes[1])
+                if trabajo is None:
+                    await self._responder(escritor, 404, {'error': 'Trabajo no encontrado'})
+                elif len(partes) == 3 and partes[2] == 'progreso':
+                    await self._transmitir(escritor, trabajo)
+                elif len(partes) == 2:
+                    await self._responder(escritor, 200, self._vista(trabajo))
+                else:
+                    await self._responder(escritor, 404, {'error': 'Ruta no encontrada'})
+            else:
+                await self._responder(escritor, 404, {'error': 'Ruta no encontrada'})
+        except ValueError as e:  # Incluye JSON inválido
+            await self._responder(escritor, 400, {'error': str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    @staticmethod
+    def _vista(trabajo):
+        """Lo que se devuelve al cliente de un trabajo."""
+        return {k: v for k, v in trabajo.items() if k != 'version'}
+
+    @staticmethod
+    async def _responder(escritor, codigo, datos):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode('utf-8')
+        textos = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found'}
+        escritor.write((f"HTTP/1.1 {codigo} {textos[codigo]}\r\n"
+                        "Content-Type: application/json; charset=utf-8\r\n"
+                        f"Content-Length: {len(cuerpo)}\r\n"
+                        "Connection: close\r\n\r\n").encode('latin-1') + cuerpo)
+        await escritor.drain()
+
+    async def _transmitir(self, escritor, trabajo):
+        """Envía una línea JSON cada vez que el trabajo avanza, hasta que termina."""
+        escritor.write(b"HTTP/1.1 200 OK\r\n"
+                       b"Content-Type: application/x-ndjson; charset=utf-8\r\n"
+                       b"Connection: close\r\n\r\n")
+        version_vista = -1
+        while True:
+            async with self._cambio:
+                await self._cambio.wait_for(lambda: trabajo['version'] != version_vista)
+                version_vista = trabajo['version']
+                vista = self._vista(trabajo)
+            escritor.write(json.dumps(vista, ensure_ascii=False).encode('utf-8') + b'\n')
+            await escritor.drain()
+            if vista['estado'] in ESTADOS_FINALES:
+                break
+
+
+async def servir(host, puerto, ruta_socket, ruta_tiendas, ruta_costos, procesos):
+    """Arranca el servicio en TCP (host:puerto) o en un socket Unix."""
+    servicio = ServicioRutas(ruta_tiendas, ruta_costos, procesos)
+    try:
+        await servicio.iniciar()
+        if ruta_socket:
+            servidor = await asyncio.start_unix_server(servicio.atender, path=ruta_socket)
+            print(f"Servicio escuchando en el socket {ruta_socket}")
+        else:
+            servidor = await asyncio.start_server(servicio.atender, host, puerto)
+            print(f"Servicio escuchando en http://{host}:{puerto}")
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        servicio.cerrar()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Servicio local de optimización de rutas")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--socket', help="Ruta de un socket Unix (en lugar de TCP)")
+    parser.add_argument('--tiendas', default=RUTA_TIENDAS)
+    parser.add_argument('--costos', default=RUTA_COSTOS)
+    parser.add_argument('--procesos', type=int, default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.socket, args.tiendas, args.costos, args.procesos))
+    except KeyboardInterrupt:
+        print("\nServicio detenido.")
@@ -2,16 +2,21 @@ import pandas as pd # type: ignore
 import numpy as np
 import matplotlib.pyplot as plt
 
-def cargar_datos(ruta_datos, ruta_costos):
+from matriz_costos import MatrizCostos
+from costos_perezosos import ProveedorCostosPerezoso
+
+def cargar_datos(ruta_datos, ruta_costos, dtype=np.float64, empaquetar=False):
     """
     Carga los datos de las tiendas y la matriz de costos desde archivos CSV.
 
     Args:
         ruta_datos (str): Ruta al archivo CSV con información de las tiendas.
         ruta_costos (str): Ruta al archivo CSV con la matriz de costos de combustible.
+        dtype: Tipo de dato para guardar los costos (np.float32 usa la mitad de memoria).
+        empaquetar (bool): Guardar solo el triángulo superior (la matriz debe ser simétrica).
 
     Returns:
-        tuple: Un DataFrame con los datos de las tiendas y una matriz de costos (np.array).
+        tuple: Un DataFrame con los datos de las tiendas y una matriz de costos (MatrizCostos).
     """
     try:
         # --- CORRECCIÓN 1: Usar los parámetros de la función ---
@@ -19,11 +24,12 @@ def cargar_datos(ruta_datos, ruta_costos):
         df_tiendas = pd.read_csv(ruta_datos)
         
         # Cargar la matriz de costos de combustible desde la ruta proporcionada.
-        matriz_costos = pd.read_csv(ruta_costos, header=None).values
+        matriz_costos = MatrizCostos.desde_densa(pd.read_csv(ruta_costos, header=None).values,
+                                                 dtype=dtype, empaquetar=empaquetar)
         
         print("Datos cargados correctamente.")
         print(f"Número total de nodos (CEDIS + Tiendas): {len(df_tiendas)}")
-        print(f"Dimensiones de la matriz de costos: {matriz_costos.shape}")
+        print(f"Dimensiones de la matriz de costos: {matriz_costos.shape} ({matriz_costos.nbytes / 1e6:.2f} MB)")
         
         return df_tiendas, matriz_costos
         
@@ -35,6 +41,39 @@ def cargar_datos(ruta_datos, ruta_costos):
         print(f" Ocurrió un error inesperado al leer los archivos: {e}")
         return None, None
 
+def cargar_datos_perezosos(ruta_datos, factor_combustible, directorio_teselas=None, **kwargs):
+    """
+    Carga los datos de las tiendas y un proveedor de costos perezoso, para redes
+    donde la matriz de costos completa no cabe en memoria.
+
+    Args:
+        ruta_datos (str): Ruta al archivo CSV con información de las tiendas.
+        factor_combustible (float): Costo de combustible por km (para costos calculados).
+        directorio_teselas (str): Carpeta con teselas explícitas de la matriz (opcional).
+        **kwargs: Opciones de ProveedorCostosPerezoso (tamano_tesela, max_teselas, dtype).
+
+    Returns:
+        tuple: Un DataFrame con los datos de las tiendas y un ProveedorCostosPerezoso.
+    """
+    try:
+        df_tiendas = pd.read_csv(ruta_datos)
+        proveedor = ProveedorCostosPerezoso.desde_tiendas(df_tiendas, factor_combustible,
+                                                          directorio_teselas=directorio_teselas, **kwargs)
+
+        print("Datos cargados correctamente.")
+        print(f"Número total de nodos (CEDIS + Tiendas): {len(df_tiendas)}")
+        print(f"Costos bajo demanda: {proveedor}")
+
+        return df_tiendas, proveedor
+
+    except FileNotFoundError as e:
+        print(f"Error: Archivo no encontrado. Verifica que la ruta y el nombre del archivo sean correctos.")
+        print(f"Detalle del error: {e}")
+        return None, None
+    except Exception as e:
+        print(f" Ocurrió un error inesperado al leer los archivos: {e}")
+        return None, None
+
 def plot_ruta(df_nodos, ruta, titulo, ax):
     """
     Dibuja una ruta en un objeto de ejes de Matplotlib.
@@ -5,11 +5,22 @@ Este script busca la ruta más corta entre varios 'municipios' (puntos).
 
 import operator
 import random
-from typing import List, Tuple
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+# La matriz de costos es la misma que usa el Recocido Simulado (UNIDAD 2).
+# Si esa carpeta no está, el algoritmo funciona igual calculando las
+# distancias con las coordenadas de cada municipio.
+sys.path.append(str(Path(__file__).resolve().parents[2] / "UNIDAD 2" / "Recocido simulado"))
+try:
+    from matriz_costos import MatrizCostos  # noqa: E402
+except ImportError:
+    MatrizCostos = None
+
 
 class Municipio:
     """
@@ -39,9 +50,18 @@ class Ruta:
     Es una lista de municipios en un orden específico.
     """
 
-    def __init__(self, ruta: List[Municipio]):
-        """Guarda la lista de municipios que forman la ruta."""
+    def __init__(self, ruta: List[Municipio],
+                 matriz_costos: Optional['MatrizCostos'] = None,
+                 indices: Optional[Dict[int, int]] = None):
+        """
+        Guarda la lista de municipios que forman la ruta.
+        Si se da 'matriz_costos', las distancias se leen de ella en lugar de
+        calcularse con las coordenadas; 'indices' dice qué fila de la matriz
+        corresponde a cada municipio ({id(municipio): fila}).
+        """
         self.ruta = ruta
+        self.matriz_costos = matriz_costos
+        self.indices = indices
         self.distancia = 0.0
         self.aptitud = 0.0
 
@@ -50,7 +70,10 @@ class Ruta:
         Suma la distancia total de la ruta (incluyendo la vuelta al inicio).
         Solo calcula la primera vez; después, usa el valor guardado.
         """
-        if self.distancia == 0:
+        if self.distancia == 0 and self.matriz_costos is not None:
+            indices = [self.indices[id(municipio)] for municipio in self.ruta]
+            self.distancia = self.matriz_costos.costo_ruta(indices, cerrada=True)
+        elif self.distancia == 0:
             distancia_relativa = 0.0
             for i in range(len(self.ruta)):
                 punto_inicial = self.ruta[i]
@@ -86,7 +109,9 @@ class AlgoritmoGeneticoTSP:
                  municipios: List[Municipio],
                  tamano_poblacion: int,
                  tamano_elite: int,
-                 tasa_mutacion: float):
+                 tasa_mutacion: float,
+                 matriz_costos: Optional['MatrizCostos'] = None,
+                 rutas_semilla: Optional[List[List[int]]] = None):
         """
         Prepara el algoritmo con los parámetros iniciales.
 
@@ -97,21 +122,49 @@ class AlgoritmoGeneticoTSP:
                           generación sin cambios.
             tasa_mutacion: Qué tan probable es (0.0 a 1.0) que una ruta cambie
                            aleatoriamente.
+            matriz_costos: Costos entre municipios (el municipio i es la fila i).
+                           Si no se da, se construye una matriz euclidiana
+                           empaquetada a partir de las coordenadas (o, si
+                           MatrizCostos no está disponible, se usa
+                           Municipio.distancia).
+            rutas_semilla: Rutas conocidas (ej. de una corrida anterior) que
+                           entran a la población inicial en lugar de rutas
+                           aleatorias, para no empezar de cero. Cada una es
+                           una permutación de los índices de 'municipios'
+                           (0..N-1), ej. la ruta de
+                           AlmacenSoluciones.ruta_inicial sin el CEDIS final.
         """
         self.municipios = municipios
         self.tamano_poblacion = tamano_poblacion
         self.tamano_elite = tamano_elite
         self.tasa_mutacion = tasa_mutacion
+
+        # Fila de la matriz de cada municipio. Se guarda aquí (y no en el municipio)
+        # para no modificar los objetos que recibe el algoritmo.
+        self.indices = {id(municipio): i for i, municipio in enumerate(municipios)}
+        if matriz_costos is None and MatrizCostos is not None:
+            matriz_costos = MatrizCostos.desde_coordenadas([(m.x, m.y) for m in municipios])
+        self.matriz_costos = matriz_costos
+        self.rutas_semilla = [list(ruta) for ruta in rutas_semilla or []]
+        for ruta in self.rutas_semilla:
+            if sorted(ruta) != list(range(len(municipios))):
+                raise ValueError("Cada ruta semilla debe visitar cada municipio (0..N-1) una sola vez")
         
         # Inicia el algoritmo creando la primera población
         self.poblacion = self._crear_poblacion_inicial()
 
     # --- 1. Métodos Principales (Cómo se usa) ---
 
-    def ejecutar(self, num_generaciones: int) -> Ruta:
+    def ejecutar(self, num_generaciones: int,
+                 al_progresar: Optional[Callable[[int, Ruta], None]] = None) -> Ruta:
         """
         Inicia el algoritmo y lo corre por N generaciones.
         Este es el método principal que se llama desde fuera.
+
+        Args:
+            num_generaciones: Cuántas generaciones evolucionar.
+            al_progresar: Función opcional que recibe (generación, mejor_ruta)
+                          al terminar cada generación.
         """
         # Imprimir estado inicial
         mejor_ruta_inicial = self.obtener_mejor_ruta_actual()
@@ -121,6 +174,9 @@ class AlgoritmoGeneticoTSP:
         for i in range(num_generaciones):
             self._evolucionar_generacion()
 
+            if al_progresar is not None:
+                al_progresar(i + 1, self.obtener_mejor_ruta_actual())
+
             # Imprimir progreso cada 50 generaciones
             if (i + 1) % 50 == 0:
                 mejor_ruta_actual = self.obtener_mejor_ruta_actual()
@@ -161,6 +217,10 @@ class AlgoritmoGeneticoTSP:
         # 6. Actualizar la población para el siguiente ciclo
         self.poblacion = nueva_generacion
 
+    def indices_de(self, ruta: Ruta) -> List[int]:
+        """Devuelve la ruta como posiciones de sus municipios en 'municipios'."""
+        return [self.indices[id(municipio)] for municipio in ruta.ruta]
+
     def obtener_mejor_ruta_actual(self) -> Ruta:
         """Revisa la población actual y devuelve la mejor ruta (la más corta)."""
         # Clasifica la población y toma el primero (índice 0)
@@ -173,13 +233,19 @@ class AlgoritmoGeneticoTSP:
     # --- PASO A: INICIALIZACIÓN ---
 
     def _crear_poblacion_inicial(self) -> List[Ruta]:
-        """Crea la primera 'generación' de rutas. Todas son aleatorias."""
-        return [self._crear_ruta_aleatoria() for _ in range(self.tamano_poblacion)]
+        """
+        Crea la primera 'generación' de rutas.
+        Primero entran las rutas semilla (si hay); el resto son aleatorias.
+        """
+        poblacion = [Ruta([self.municipios[i] for i in ruta], self.matriz_costos, self.indices)
+                     for ruta in self.rutas_semilla[:self.tamano_poblacion]]
+        faltantes = self.tamano_poblacion - len(poblacion)
+        return poblacion + [self._crear_ruta_aleatoria() for _ in range(faltantes)]
 
     def _crear_ruta_aleatoria(self) -> Ruta:
         """Crea una única ruta desordenando la lista de municipios."""
         ruta_lista = random.sample(self.municipios, len(self.municipios))
-        return Ruta(ruta_lista)
+        return Ruta(ruta_lista, self.matriz_costos, self.indices)
 
     # --- PASO B: EVALUACIÓN Y SELECCIÓN ---
 
@@ -287,7 +353,7 @@ class AlgoritmoGeneticoTSP:
         # 3. Combinar: el trozo del padre 1 + lo restante del padre 2
         hijo_genes = genes_p1 + genes_p2
 
-        return Ruta(hijo_genes)
+        return Ruta(hijo_genes, self.matriz_costos, self.indices)
 
     # --- PASO D: MUTACIÓN ---
 
@@ -331,7 +397,7 @@ class AlgoritmoGeneticoTSP:
                 ruta_mutada_lista[indice_con] = municipio1
 
         # Devuelve una NUEVA ruta con los cambios
-        return Ruta(ruta_mutada_lista)
+        return Ruta(ruta_mutada_lista, self.matriz_costos, self.indices)
 
 
 # --- Bloque de Ejecución Principal ---
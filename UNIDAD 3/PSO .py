@@ -3,6 +3,8 @@ import matplotlib.pyplot as plt
 from scipy.stats import multivariate_normal
 import pyswarms as ps
 
+from capa_variabilidad import CapaVariabilidad
+
 #1. CONFIGURACIÓN DEL ENTORNO SIMULADO ---
 
 # Área de estudio (ej. un campo de 100m x 100m)
@@ -37,11 +39,31 @@ variabilidad_1 = multivariate_normal(mean=coords_hotspot_1, cov=[[30, 0], [0, 30
 variabilidad_2 = multivariate_normal(mean=coords_hotspot_2, cov=[[50, 0], [0, 50]])
 variabilidad_3 = multivariate_normal(mean=coords_hotspot_3, cov=[[20, 0], [0, 20]])
 
+# Mapa de variabilidad REAL (opcional).
+# Si se indica la ruta a un ráster '.npy' o binario (con su '<ruta>.json' de
+# georreferenciación), se usa en lugar de los hotspots simulados. El archivo
+# se abre con memoria mapeada, así que puede ser más grande que la RAM.
+RUTA_RASTER_VARIABILIDAD = None
+
+capa_raster = None
+if RUTA_RASTER_VARIABILIDAD is not None:
+    capa_raster = CapaVariabilidad.desde_archivo(RUTA_RASTER_VARIABILIDAD)
+
+# Límites del campo (x_min, x_max, y_min, y_max): los del ráster si existe
+if capa_raster is not None:
+    LIMITES_CAMPO = capa_raster.extension
+else:
+    LIMITES_CAMPO = (0, TAMANO_CAMPO, 0, TAMANO_CAMPO)
+
 def obtener_variabilidad(x, y):
     """
     Calcula la "necesidad de monitoreo" combinada en un punto (x, y) del campo.
     Un valor más alto significa que es más importante tener un sensor cerca.
     """
+    # Con ráster: interpolación bilineal vectorizada sobre el mapa real
+    if capa_raster is not None:
+        return capa_raster.muestrear(x, y)
+
     # Apilamos X e Y en la última dimensión para crear un grid de puntos (x,y)
     # Forma de entrada x: (ej. 100, 100), y: (ej. 100, 100)
     # Forma de salida pos: (ej. 100, 100, 2)
@@ -54,6 +76,15 @@ def obtener_variabilidad(x, y):
 
 #3. DISEÑO DE LA FUNCIÓN DE COSTO (FITNESS FUNCTION) ---
 
+# Creamos una grilla de 20x20 para muestrear el campo
+# (Evaluar en cada cm sería muy lento, esto es una buena aproximación)
+# La variabilidad no depende de los sensores, así que se calcula UNA sola vez
+# para toda la optimización (importante cuando viene de un ráster en disco).
+grilla_x, grilla_y = np.meshgrid(np.linspace(LIMITES_CAMPO[0], LIMITES_CAMPO[1], 20),
+                                 np.linspace(LIMITES_CAMPO[2], LIMITES_CAMPO[3], 20))
+PUNTOS_GRILLA = np.stack([grilla_x.ravel(), grilla_y.ravel()], axis=-1)  # (400, 2)
+VARIABILIDAD_GRILLA = obtener_variabilidad(PUNTOS_GRILLA[:, 0], PUNTOS_GRILLA[:, 1])  # (400,)
+
 def funcion_costo(lote_particulas):
     """
     Esta es la función que PSO intentará MINIMIZAR.
@@ -64,46 +95,20 @@ def funcion_costo(lote_particulas):
     # 'lote_particulas' tiene forma (N_PARTICULAS, N_DIMENSIONES)
     # Ejemplo: (50, 10) si hay 50 partículas y 5 sensores (10 dims)
     
-    costos = []
+    # Lo convertimos a una forma útil: (N_PARTICULAS, N_SENSORES, 2)
+    posiciones_sensores = lote_particulas.reshape(len(lote_particulas), N_SENSORES, 2)
+    
+    # 1. Distancia de cada punto de la grilla a TODOS los sensores de cada partícula
+    # Forma: (N_PARTICULAS, N_PUNTOS_GRILLA, N_SENSORES)
+    diferencias = PUNTOS_GRILLA[np.newaxis, :, np.newaxis, :] - posiciones_sensores[:, np.newaxis, :, :]
+    distancias = np.linalg.norm(diferencias, axis=-1)
     
-    # Creamos una grilla de 20x20 para muestrear el campo
-    # (Evaluar en cada cm sería muy lento, esto es una buena aproximación)
-    puntos_grilla = np.linspace(0, TAMANO_CAMPO, 20)
+    # 2. Distancia al sensor MÁS CERCANO para cada punto
+    distancia_minima = distancias.min(axis=2)
     
-    # Iteramos sobre cada partícula (cada solución candidata)
-    for particula in lote_particulas:
-        # particula es un vector 1D de 10 elementos: [x1, y1, x2, y2, ...]
-        # Lo convertimos a una forma útil: (N_SENSORES, 2)
-        # Ejemplo: [[x1, y1], [x2, y2], ...]
-        posiciones_sensores = particula.reshape(N_SENSORES, 2)
-        
-        costo_total_particula = 0
-        
-        # Iteramos sobre cada punto (gx, gy) de nuestra grilla del campo
-        for gx in puntos_grilla:
-            for gy in puntos_grilla:
-                # 1. Obtener la variabilidad (importancia) de este punto
-                variabilidad = obtener_variabilidad(gx, gy)
-                
-                # 2. Calcular la distancia de este punto (gx, gy) a TODOS los sensores
-                # Usamos la norma de NumPy (distancia euclidiana)
-                punto = np.array([gx, gy])
-                distancias = np.linalg.norm(posiciones_sensores - punto, axis=1)
-                
-                # 3. Encontrar la distancia al sensor MÁS CERCANO
-                distancia_minima = np.min(distancias)
-                
-                # 4. Calcular el costo para este punto
-                # "El costo es alto si la variabilidad es alta Y el sensor más cercano está lejos"
-                costo_punto = variabilidad * distancia_minima
-                
-                costo_total_particula += costo_punto
-                
-        # Agregamos el costo total de esta partícula a la lista
-        costos.append(costo_total_particula)
-        
+    # 3. "El costo es alto si la variabilidad es alta Y el sensor más cercano está lejos"
     # Devolvemos un array 1D con el costo de cada partícula
-    return np.array(costos)
+    return distancia_minima @ VARIABILIDAD_GRILLA
 
 #4. CONFIGURACIÓN Y EJECUCIÓN DE PSO
 
@@ -112,12 +117,12 @@ def funcion_costo(lote_particulas):
 opciones = {'c1': 0.5, 'c2': 0.3, 'w': 0.9}
 
 # Límites del espacio de búsqueda
-# Cada coordenada (x o y) debe estar dentro del campo (0 a TAMANO_CAMPO)
+# Cada coordenada (x o y) debe estar dentro del campo (LIMITES_CAMPO)
 
-# Límite inferior (un array de N_DIMENSIONES ceros)
-limites_minimos = np.zeros(N_DIMENSIONES)
-# Límite superior (un array de N_DIMENSIONES "100")
-limites_maximos = np.ones(N_DIMENSIONES) * TAMANO_CAMPO
+# Límite inferior: [x_min, y_min, x_min, y_min, ...]
+limites_minimos = np.tile([LIMITES_CAMPO[0], LIMITES_CAMPO[2]], N_SENSORES)
+# Límite superior: [x_max, y_max, x_max, y_max, ...]
+limites_maximos = np.tile([LIMITES_CAMPO[1], LIMITES_CAMPO[3]], N_SENSORES)
 
 # Creamos una tupla de límites
 limites = (limites_minimos, limites_maximos)
@@ -155,8 +160,8 @@ for i, (x, y) in enumerate(posiciones_optimas):
 print("\n Generando visualización de resultados...")
 
 # Crear una malla para graficar el mapa de variabilidad
-x_plot = np.linspace(0, TAMANO_CAMPO, 100)
-y_plot = np.linspace(0, TAMANO_CAMPO, 100)
+x_plot = np.linspace(LIMITES_CAMPO[0], LIMITES_CAMPO[1], 100)
+y_plot = np.linspace(LIMITES_CAMPO[2], LIMITES_CAMPO[3], 100)
 X, Y = np.meshgrid(x_plot, y_plot)
 Z = obtener_variabilidad(X, Y)
 
@@ -170,10 +175,11 @@ plt.colorbar(label='Índice de Variabilidad (Suelo/Cultivo/Topo)')
 plt.scatter(posiciones_optimas[:, 0], posiciones_optimas[:, 1], 
             c='red', s=150, marker='X', label='Posición Óptima del Sensor')
 
-# Dibujar los "hotspots" originales para referencia
-plt.scatter([coords_hotspot_1[0], coords_hotspot_2[0], coords_hotspot_3[0]], 
-            [coords_hotspot_1[1], coords_hotspot_2[1], coords_hotspot_3[1]], 
-            c='blue', s=50, marker='*', label='Centros de Variabilidad (Simulados)')
+# Dibujar los "hotspots" originales para referencia (solo en modo simulado)
+if capa_raster is None:
+    plt.scatter([coords_hotspot_1[0], coords_hotspot_2[0], coords_hotspot_3[0]], 
+                [coords_hotspot_1[1], coords_hotspot_2[1], coords_hotspot_3[1]], 
+                c='blue', s=50, marker='*', label='Centros de Variabilidad (Simulados)')
 
 plt.title(f'Optimización PSO para Ubicación de {N_SENSORES} Sensores en Guasave (Simulada)', fontsize=16)
 plt.xlabel('Coordenada X del Campo (m)')
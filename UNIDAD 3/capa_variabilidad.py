@@ -0,0 +1,124 @@
+"""
+Capa de variabilidad leída desde un ráster en disco (mapa de suelo, cultivo
+o topografía) para alimentar la función de costo del PSO.
+
+El ráster se abre con memoria mapeada (np.memmap / np.load con mmap_mode),
+así que un mapa de varios gigabytes no se carga completo en RAM: solo se leen
+las páginas de los píxeles que realmente se consultan.
+"""
+
+import json
+import os
+
+import numpy as np
+
+
+class CapaVariabilidad:
+    """
+    Ráster 2D georreferenciado que se muestrea con interpolación bilineal.
+
+    La georreferenciación sigue la convención "norte arriba":
+    (origen_x, origen_y) es la esquina superior izquierda del ráster y
+    tamano_pixel_y suele ser negativo (las filas crecen hacia el sur).
+    """
+
+    def __init__(self, datos, origen_x: float, origen_y: float,
+                 tamano_pixel_x: float, tamano_pixel_y: float,
+                 sin_dato: float = None):
+        """
+        Args:
+            datos: Arreglo 2D (filas, columnas); normalmente un np.memmap.
+            origen_x: Coordenada X de la esquina superior izquierda.
+            origen_y: Coordenada Y de la esquina superior izquierda.
+            tamano_pixel_x: Ancho de un píxel en unidades del campo.
+            tamano_pixel_y: Alto de un píxel (negativo si el norte está arriba).
+            sin_dato: Valor que marca píxeles sin información (se toman como 0).
+        """
+        if datos.ndim != 2:
+            raise ValueError(f"El ráster debe ser 2D, se recibió forma {datos.shape}")
+        self.datos = datos
+        self.origen_x = float(origen_x)
+        self.origen_y = float(origen_y)
+        self.tamano_pixel_x = float(tamano_pixel_x)
+        self.tamano_pixel_y = float(tamano_pixel_y)
+        self.sin_dato = sin_dato
+
+    @classmethod
+    def desde_archivo(cls, ruta_raster: str, ruta_metadatos: str = None) -> 'CapaVariabilidad':
+        """
+        Abre un ráster '.npy' o binario crudo con su archivo de metadatos JSON.
+
+        Si no se indica 'ruta_metadatos' se busca '<ruta_raster>.json'.
+        El JSON debe tener 'origen_x', 'origen_y', 'tamano_pixel_x' y
+        'tamano_pixel_y'; para binarios crudos también 'filas', 'columnas'
+        y 'dtype' (ej. "float32"). 'sin_dato' es opcional.
+        """
+        if ruta_metadatos is None:
+            ruta_metadatos = ruta_raster + '.json'
+        with open(ruta_metadatos, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        if os.path.splitext(ruta_raster)[1].lower() == '.npy':
+            datos = np.load(ruta_raster, mmap_mode='r')
+        else:
+            datos = np.memmap(ruta_raster, dtype=np.dtype(meta['dtype']), mode='r',
+                              shape=(int(meta['filas']), int(meta['columnas'])),
+                              offset=int(meta.get('desplazamiento', 0)))
+
+        return cls(datos,
+                   origen_x=meta['origen_x'],
+                   origen_y=meta['origen_y'],
+                   tamano_pixel_x=meta['tamano_pixel_x'],
+                   tamano_pixel_y=meta['tamano_pixel_y'],
+                   sin_dato=meta.get('sin_dato'))
+
+    @property
+    def extension(self):
+        """Devuelve (x_min, x_max, y_min, y_max) que cubre el ráster."""
+        filas, columnas = self.datos.shape
+        x_fin = self.origen_x + columnas * self.tamano_pixel_x
+        y_fin = self.origen_y + filas * self.tamano_pixel_y
+        return (min(self.origen_x, x_fin), max(self.origen_x, x_fin),
+                min(self.origen_y, y_fin), max(self.origen_y, y_fin))
+
+    def muestrear(self, x, y) -> np.ndarray:
+        """
+        Interpolación bilineal vectorizada en los puntos (x, y).
+
+        'x' e 'y' pueden ser escalares o arreglos de cualquier forma (deben
+        coincidir); el resultado tiene esa misma forma. Los puntos fuera del
+        ráster toman el valor del borde más cercano.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        filas, columnas = self.datos.shape
+
+        # Coordenadas continuas en "espacio de píxel" (centros en enteros)
+        col = (x - self.origen_x) / self.tamano_pixel_x - 0.5
+        fil = (y - self.origen_y) / self.tamano_pixel_y - 0.5
+        col = np.clip(col, 0, columnas - 1)
+        fil = np.clip(fil, 0, filas - 1)
+
+        c0 = np.floor(col).astype(np.intp)
+        f0 = np.floor(fil).astype(np.intp)
+        c1 = np.minimum(c0 + 1, columnas - 1)
+        f1 = np.minimum(f0 + 1, filas - 1)
+        wc = col - c0
+        wf = fil - f0
+
+        # Indexado avanzado: solo se leen del disco los píxeles vecinos
+        v00 = self._leer(f0, c0)
+        v01 = self._leer(f0, c1)
+        v10 = self._leer(f1, c0)
+        v11 = self._leer(f1, c1)
+
+        arriba = v00 * (1 - wc) + v01 * wc
+        abajo = v10 * (1 - wc) + v11 * wc
+        return arriba * (1 - wf) + abajo * wf
+
+    def _leer(self, filas_idx, columnas_idx) -> np.ndarray:
+        """Lee píxeles como float64, cambiando 'sin_dato' (y NaN) por 0."""
+        valores = np.asarray(self.datos[filas_idx, columnas_idx], dtype=np.float64)
+        if self.sin_dato is not None:
+            valores = np.where(valores == self.sin_dato, 0.0, valores)
+        return np.nan_to_num(valores, nan=0.0)